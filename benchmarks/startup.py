@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Measures how long it takes to import transmitm, build a configuration with
+many proxies and register them with the Dispatcher; importing the reactor
+(and Twisted) is timed on its own since transmitm defers it until proxies are
+spawned
+
+    python benchmarks/startup.py --proxies 5000
+"""
+import argparse
+import resource
+import subprocess
+import sys
+from statistics import median
+
+RUN = """
+import sys
+from time import perf_counter
+
+start = perf_counter()
+import transmitm
+imported = perf_counter()
+proxies = [
+    transmitm.{cls}('127.0.0.1', 9, bind_port={base_port} + i)
+    for i in range({proxies})
+]
+built = perf_counter()
+lazy = 'twisted.internet.reactor' not in sys.modules
+from twisted.internet import reactor
+reactor_imported = perf_counter()
+transmitm.Dispatcher.add_proxies(proxies)
+registered = perf_counter()
+
+print(imported - start, built - imported, reactor_imported - built,
+      registered - reactor_imported, registered - start, lazy)
+"""
+STEPS = ('import', 'configuration', 'twisted', 'add_proxies', 'total')
+
+
+def run(args):
+    """Run a measurement in a fresh interpreter so imports are not cached
+    """
+    code = RUN.format(cls=args.cls,
+                      base_port=args.base_port,
+                      proxies=args.proxies)
+    out = subprocess.check_output([sys.executable, '-c', code])
+    *timings, lazy = out.split()
+    return [float(timing) for timing in timings], lazy == b'True'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--proxies', type=int, default=5000)
+    parser.add_argument('--base-port', type=int, default=20000)
+    parser.add_argument('--cls', choices=('TCPProxy', 'UDPProxy'),
+                        default='TCPProxy')
+    parser.add_argument('--runs', type=int, default=9)
+    args = parser.parse_args()
+
+    # Every proxy holds a listening socket; inherited by the subprocesses
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    limit = args.proxies + 256
+
+    if soft < limit:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(limit, hard), hard))
+
+    runs = [run(args) for _ in range(args.runs)]
+    timings = zip(*(timings for timings, _ in runs))
+
+    print('{} {}, median of {} runs (reactor import deferred: {})'.format(
+        args.proxies, args.cls, args.runs, runs[0][1]))
+
+    for step, values in zip(STEPS, timings):
+        print('  {:<14}{:.3f}s'.format(step, median(values)))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,7 @@ from .transmitm import Tap, Dispatcher
 from .proxy import Proxy
 from .tcp import TCPProxy
 from .udp import UDPProxy
+from .shaper import Shaper
 
 __version__ = '0.1.0'
-__all__ = [Tap, Dispatcher, Proxy, TCPProxy, UDPProxy]
+__all__ = [Tap, Dispatcher, Proxy, TCPProxy, UDPProxy, Shaper]
@@ -1,5 +1,14 @@
 from abc import ABCMeta, abstractstaticmethod, abstractmethod
 from ipaddress import ip_address, IPv4Address, IPv6Address
+from weakref import WeakValueDictionary
+
+
+def _reactor():
+    """Get the reactor; importing it installs the default one, so it's
+    deferred until proxies actually need it
+    """
+    from twisted.internet import reactor
+    return reactor
 
 
 class Proxy(metaclass=ABCMeta):
@@ -9,7 +18,8 @@ class Proxy(metaclass=ABCMeta):
                  server_ip,
                  server_port,
                  bind_port=0,
-                 interface='127.0.0.1'):
+                 interface='127.0.0.1',
+                 shaper=None):
         """
         Args:
             server_ip (str): Target server IP to which the connections are
@@ -18,20 +28,76 @@ class Proxy(metaclass=ABCMeta):
             bind_port (int, optional): Proxy bind port. Defaults to 0 (random).
             interface (str, optional): Proxy bind interface. Defaults to
                 '127.0.0.1'.
+            shaper (Shaper, optional): Rate limits every flow going through
+                the proxy. Defaults to None (no shaping).
         """
         self.server_ip = server_ip
         self.server_port = server_port
         self.bind_port = bind_port
         self.interface = interface
-        self.taps = list()
+        self.shaper = shaper
+        # (tap, handler, flow_filter) in chain order
+        self._chain = list()
+        # Tap chains of live flows, updated when taps are added; created on
+        # the first flow since most proxies are only configured at startup
+        self._flows = None
 
-    def add_tap(self, tap):
+    def add_tap(self, tap, sample=1, flow_filter=None):
         """Connect a tap instance to the proxy's instance
 
         Args:
             tap (Tap): Tap object; add order defines the interception chain
+            sample (int, optional): Only 1 in every `sample` chunks is handed
+                to the tap; chunks are counted across all flows and both
+                directions, not per flow. Defaults to 1 (every chunk).
+            flow_filter (callable, optional): Predicate called with a flow's
+                client facing ip_tuple; the tap handles both directions of the
+                flows for which it is true. Evaluated once per connection or
+                UDP mapping. Defaults to None.
+
+        Raises:
+            TypeError: on a sample rate that is not an integer
+            ValueError: on a sample rate lower than 1
+        """
+        if not isinstance(sample, int):
+            raise TypeError('Tap sample rate must be an integer')
+
+        if sample < 1:
+            raise ValueError('Tap sample rate must be at least 1')
+
+        handler = tap if sample == 1 else _SampledTap(tap, sample)
+        self._chain.append((tap, handler, flow_filter))
+
+        # Extend the chains of flows already set up
+        for chain in list(self._flows.values() if self._flows else ()):
+            if flow_filter is None or flow_filter(chain.ip_tuple):
+                chain.append(handler)
+
+    def flow_taps(self, ip_tuple):
+        """Resolve the tap chain of a flow; called by proxies once per flow,
+        the chain is shared by both directions and kept up to date by add_tap
+
+        Args:
+            ip_tuple (tuple): client facing (peer_ip_tuple, local_ip_tuple)
+
+        Returns:
+            list: objects exposing the Tap.handle method, in chain order
         """
-        self.taps.append(tap)
+        chain = _FlowChain(
+            handler for _, handler, flow_filter in self._chain
+            if flow_filter is None or flow_filter(ip_tuple))
+        chain.ip_tuple = ip_tuple
+
+        if self._flows is None:
+            self._flows = WeakValueDictionary()
+
+        self._flows[id(chain)] = chain
+        return chain
+
+    @property
+    def taps(self):
+        """tuple: taps in chain order; use add_tap to attach one"""
+        return tuple(tap for tap, _, _ in self._chain)
 
     def __hash__(self):
         """Override comparison methods for Proxy objects
@@ -80,3 +146,30 @@ class Proxy(metaclass=ABCMeta):
         e.g. starts listeners
         """
         pass
+
+
+class _FlowChain(list):
+    """Tap chain of a flow; weak referenceable so that proxies can track
+    live flows without keeping them alive
+    """
+    __slots__ = ('ip_tuple', '__weakref__')
+
+
+class _SampledTap:
+    """Wraps a tap so that it handles only 1 in every `every` chunks
+    """
+    __slots__ = ('tap', 'every', 'count')
+
+    def __init__(self, tap, every):
+        self.tap = tap
+        self.every = every
+        self.count = 0
+
+    def handle(self, data, ip_tuple):
+        self.count += 1
+
+        if self.count < self.every:
+            return data
+
+        self.count = 0
+        return self.tap.handle(data, ip_tuple)
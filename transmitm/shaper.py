@@ -0,0 +1,128 @@
+from .proxy import _reactor
+
+
+class Shaper:
+    """Per-flow rate limiter used by proxies to shape traffic
+
+    Every flow gets a bandwidth and a packet rate token bucket per direction;
+    flows are keyed by their client facing ip_tuple, by default on the client
+    host so that all connections of a client share its budget. Buckets are
+    implemented as a GCRA (virtual scheduling) so a flow's state is just two
+    timestamps; a flow whose timestamps are in the past has full buckets and is
+    indistinguishable from a new one, which makes it safe to evict.
+    """
+    def __init__(self,
+                 bandwidth=None,
+                 pps=None,
+                 burst=1.0,
+                 max_delay=1.0,
+                 sweep_interval=60,
+                 key=None,
+                 clock=None):
+        """
+        Args:
+            bandwidth (int, optional): Bytes per second allowed for each flow.
+                Defaults to None (unlimited).
+            pps (int, optional): Packets (chunks) per second allowed for each
+                flow. Defaults to None (unlimited).
+            burst (float, optional): Bucket depth expressed in seconds worth
+                of traffic. Defaults to 1.0.
+            max_delay (float, optional): Data which would be delayed for longer
+                than this many seconds is rejected; UDP datagrams are dropped,
+                which bounds the number of datagrams held for a flow. None
+                never rejects. Defaults to 1.0.
+            sweep_interval (int, optional): Seconds between evictions of idle
+                flows. Defaults to 60.
+            key (callable, optional): Maps a client facing ip_tuple to the
+                key a flow is accounted under. Defaults to the client host.
+            clock (IReactorTime, optional): Time source, also used to release
+                held data. Defaults to reactor.
+        """
+        if not (bandwidth or pps):
+            raise ValueError('Shaper requires bandwidth and/or pps')
+
+        self.bandwidth = bandwidth
+        self.pps = pps
+        self.burst = burst
+        self.max_delay = max_delay
+        self.sweep_interval = sweep_interval
+        self.key = key or Shaper.client_host
+        self._clock = clock
+        self.flows = dict()
+        # Scheduled from the first delay so that no clock is needed until then
+        self._next_sweep = None
+
+    @property
+    def clock(self):
+        """IReactorTime: time source; the reactor is only looked up once
+        data is shaped, so building a configuration doesn't install it
+        """
+        if self._clock is None:
+            self._clock = _reactor()
+
+        return self._clock
+
+    @staticmethod
+    def client_host(ip_tuple):
+        return ip_tuple[0][0]
+
+    def flow(self, ip_tuple, upstream):
+        """Get the flow a connection or UDP mapping is accounted under
+
+        Args:
+            ip_tuple (tuple): client facing (peer_ip_tuple, local_ip_tuple)
+            upstream (bool): True for client to server data
+
+        Returns:
+            tuple: flow identifier to be passed to delay
+        """
+        return (self.key(ip_tuple), upstream)
+
+    def delay(self, flow, size, droppable=True):
+        """Account a chunk of data for a flow and get how long to hold it
+
+        Args:
+            flow (tuple): flow identifier, see Shaper.flow
+            size (int): chunk length in bytes
+            droppable (bool, optional): Whether max_delay applies; stream
+                transports can't drop data. Defaults to True.
+
+        Returns:
+            float: seconds to wait before forwarding the data (0 means now) or
+                None when the data exceeds max_delay and must be rejected
+        """
+        now = self.clock.seconds()
+
+        if self._next_sweep is None:
+            self._next_sweep = now + self.sweep_interval
+        elif now >= self._next_sweep:
+            self.sweep(now)
+
+        tat_bytes, tat_pkts = self.flows.get(flow, (now, now))
+        wait = 0
+
+        if self.bandwidth:
+            tat_bytes = max(tat_bytes, now) + size / self.bandwidth
+            wait = tat_bytes - self.burst - now
+
+        if self.pps:
+            tat_pkts = max(tat_pkts, now) + 1 / self.pps
+            wait = max(wait, tat_pkts - self.burst - now)
+
+        if droppable and self.max_delay is not None and wait > self.max_delay:
+            return None
+
+        self.flows[flow] = (tat_bytes, tat_pkts)
+        return max(wait, 0)
+
+    def sweep(self, now=None):
+        """Evict flows that have been idle long enough to refill their buckets
+        """
+        if now is None:
+            now = self.clock.seconds()
+
+        self.flows = {
+            flow: tats
+            for flow, tats in self.flows.items() if max(tats) > now
+        }
+        self._next_sweep = now + self.sweep_interval
@@ -0,0 +1,86 @@
+from .proxy import Proxy, _reactor
+from .tcp import TCPProxy
+from twisted.internet import protocol
+
+
+class TCPProto(protocol.Protocol):
+    def write(self, data):
+        if data:
+            self.transport.write(data)
+
+
+class TCPServerFactory(protocol.ServerFactory):
+    # Every proxy and every proxied connection gets its own factory, so the
+    # "Starting factory" log lines carry no information while accounting for
+    # about a quarter of the time spent spawning proxies
+    noisy = False
+
+    def __init__(self, server_ip, server_port, proxy):
+        self.server_ip = server_ip
+        self.server_port = server_port
+        self.proxy = proxy
+
+
+class TCPServerProtocol(TCPProto):
+    """Acts as a proxy between the actual client(s) and target server
+    ServerProtocol forwards data to the server through ClientProtocol or back
+    """
+    def __init__(self):
+        self.buffer = None
+        self.client = None
+
+    def connectionMade(self):
+        """When connection is received from client via tranparent proxying rule,
+        the client factory spawns a connection to the with the target server
+        """
+        # Disable Nagle's algorithm
+        self.transport.setTcpNoDelay(True)
+        self.ip_tuple = Proxy.socket_tuple(self.transport.socket)
+        self.taps = self.factory.proxy.flow_taps(self.ip_tuple)
+
+        if self.factory.proxy.shaper is not None:
+            self.flow = self.factory.proxy.shaper.flow(self.ip_tuple, True)
+
+        factory = protocol.ClientFactory()
+        factory.protocol = TCPClientProtocol
+        factory.noisy = False
+        factory.proxy = self.factory.proxy
+        factory.server = self
+        _reactor().connectTCP(self.factory.server_ip,
+                              self.factory.server_port, factory)
+
+    @TCPProxy.intercept
+    def dataReceived(self, data):
+        """When data is received from the client (that should talk with the
+        target server), send it to the tap to have it mutated then back to
+        actual client
+        """
+        if (self.client is not None):
+            self.client.write(data)
+        else:
+            self.buffer = data
+
+
+class TCPClientProtocol(TCPProto):
+    """Acts as intermediary client and speaks directly to the target server
+    """
+    def connectionMade(self):
+        # Disable Nagle's algorithm
+        self.transport.setTcpNoDelay(True)
+        self.ip_tuple = Proxy.socket_tuple(self.transport.socket)
+        # Flow filters are evaluated on the client facing side only
+        self.taps = self.factory.server.taps
+
+        if self.factory.proxy.shaper is not None:
+            self.flow = self.factory.proxy.shaper.flow(
+                self.factory.server.ip_tuple, False)
+
+        self.factory.server.client = self
+        self.write(self.factory.server.buffer)
+        self.factory.server.buffer = b''
+
+    @TCPProxy.intercept
+    def dataReceived(self, data):
+        """When data is received from the target server send it back rightaway
+        """
+        self.factory.server.write(data)
@@ -1,3 +1,5 @@
+import subprocess
+import sys
 import transmitm
 import pytest
 
@@ -10,7 +12,8 @@ def test_api():
         hasattr(transmitm, 'Tap'),
         hasattr(transmitm, 'TCPProxy'),
         hasattr(transmitm, 'UDPProxy'),
-        hasattr(transmitm, 'Proxy')
+        hasattr(transmitm, 'Proxy'),
+        hasattr(transmitm, 'Shaper')
     ]) is True
 
 
@@ -45,3 +48,101 @@ def test_dispatcher_instance():
     with pytest.raises(TypeError,
                        match="Dispatcher class cannot be instantiated"):
         transmitm.Dispatcher()
+
+
+def test_shaper_bad():
+    """Shaper requires at least one rate"""
+    with pytest.raises(ValueError, match="Shaper requires bandwidth*"):
+        transmitm.Shaper()
+
+
+class UpperTap(transmitm.Tap):
+    def handle(self, data, ip_tuple):
+        return data.upper()
+
+
+def test_proxy_tap_sample():
+    """A sampled tap handles 1 in N chunks"""
+    proxy = transmitm.TCPProxy('127.0.0.1', 80)
+    proxy.add_tap(UpperTap(), sample=3)
+    tap, = proxy.flow_taps(None)
+
+    assert [tap.handle(b'a', None) for _ in range(6)] == [b'a', b'a', b'A'] * 2
+
+    with pytest.raises(ValueError, match="Tap sample rate must be*"):
+        proxy.add_tap(UpperTap(), sample=0)
+
+    with pytest.raises(TypeError, match="Tap sample rate must be*"):
+        proxy.add_tap(UpperTap(), sample=1.5)
+
+    assert len(proxy.taps) == 1
+
+
+def test_proxy_taps_readonly():
+    """Taps are attached through add_tap only"""
+    proxy = transmitm.TCPProxy('127.0.0.1', 80)
+
+    with pytest.raises(AttributeError):
+        proxy.taps.append(UpperTap())
+
+    with pytest.raises(AttributeError):
+        proxy.taps = [UpperTap()]
+
+
+def test_proxy_tap_filter():
+    """Flow filters select the taps of a flow's chain"""
+    local = ('127.0.0.1', 8080)
+    upper, lower = UpperTap(), UpperTap()
+    proxy = transmitm.UDPProxy('127.0.0.1', 53)
+    proxy.add_tap(upper, flow_filter=lambda ip_tuple: ip_tuple[0][1] == 1)
+    proxy.add_tap(lower)
+
+    assert proxy.flow_taps((('127.0.0.1', 1), local)) == [upper, lower]
+    assert proxy.flow_taps((('127.0.0.1', 2), local)) == [lower]
+    assert proxy.taps == (upper, lower)
+
+
+def test_lazy_reactor():
+    """Importing the module and building a configuration should neither
+    install the reactor nor load the Twisted protocols"""
+    code = ("import sys, transmitm; "
+            "shaper = transmitm.Shaper(bandwidth=1000); "
+            "proxy = transmitm.UDPProxy('127.0.0.1', 53, shaper=shaper); "
+            "assert 'twisted.internet.reactor' not in sys.modules; "
+            "assert 'twisted.internet.protocol' not in sys.modules")
+    subprocess.check_call([sys.executable, '-c', code])
+
+
+@pytest.mark.parametrize('interfaces', [
+    ('127.0.0.1', '127.0.0.1'),
+    ('0.0.0.0', '127.0.0.1'),
+    ('::1', '::0'),
+    ('', '127.0.0.1'),
+    ('localhost', 'LOCALHOST'),
+])
+def test_dispatcher_bind_collision(interfaces):
+    """Colliding binds are rejected before any proxy is spawned"""
+    proxies = [
+        transmitm.UDPProxy('127.0.0.1', 53, bind_port=65053, interface=iface)
+        for iface in interfaces
+    ]
+    registered = list(transmitm.Dispatcher.proxies)
+
+    with pytest.raises(RuntimeError, match="UDPProxy bind .* already in use"):
+        transmitm.Dispatcher.add_proxies(proxies)
+
+    assert transmitm.Dispatcher.proxies == registered
+
+
+def test_proxy_tap_live():
+    """Taps added later apply to flows already set up"""
+    local = ('127.0.0.1', 8080)
+    upper, lower = UpperTap(), UpperTap()
+    proxy = transmitm.TCPProxy('127.0.0.1', 80)
+    chain = proxy.flow_taps((('127.0.0.1', 1), local))
+    other = proxy.flow_taps((('127.0.0.1', 2), local))
+    proxy.add_tap(upper)
+    proxy.add_tap(lower, flow_filter=lambda ip_tuple: ip_tuple[0][1] == 1)
+
+    assert chain == [upper, lower]
+    assert other == [upper]
@@ -0,0 +1,150 @@
+"""Contains unit tests for the traffic shaper
+"""
+import pytest
+import transmitm
+from types import SimpleNamespace
+from twisted.internet import task
+
+FLOW = (('127.0.0.1', 1234), ('127.0.0.1', 8080))
+
+
+@pytest.fixture
+def clock():
+    return task.Clock()
+
+
+def test_bandwidth(clock):
+    """Data within burst passes, the rest is delayed at bandwidth rate"""
+    shaper = transmitm.Shaper(bandwidth=100, burst=1, clock=clock)
+
+    assert shaper.delay(FLOW, 100) == 0
+    assert shaper.delay(FLOW, 50) == pytest.approx(0.5)
+    assert shaper.delay(FLOW, 50) == pytest.approx(1)
+
+    clock.advance(2)
+    assert shaper.delay(FLOW, 100) == 0
+
+
+def test_pps(clock):
+    shaper = transmitm.Shaper(pps=10, burst=0.2, clock=clock)
+
+    assert shaper.delay(FLOW, 1) == 0
+    assert shaper.delay(FLOW, 1) == 0
+    assert shaper.delay(FLOW, 1) == pytest.approx(0.1)
+
+
+def test_flows_independent(clock):
+    other = (('127.0.0.1', 4321), ('127.0.0.1', 8080))
+    shaper = transmitm.Shaper(bandwidth=100, burst=1, clock=clock)
+
+    assert shaper.delay(FLOW, 200) == pytest.approx(1)
+    assert shaper.delay(other, 100) == 0
+
+
+def test_max_delay(clock):
+    """Rejected data should not consume tokens unless it can't be dropped"""
+    shaper = transmitm.Shaper(bandwidth=100, burst=0, max_delay=1,
+                              clock=clock)
+
+    assert shaper.delay(FLOW, 100) == pytest.approx(1)
+    assert shaper.delay(FLOW, 100) is None
+    assert shaper.delay(FLOW, 100, droppable=False) == pytest.approx(2)
+
+
+def test_sweep(clock):
+    """Flows with full buckets are evicted"""
+    shaper = transmitm.Shaper(bandwidth=100, max_delay=None, sweep_interval=10,
+                              clock=clock)
+    shaper.delay(FLOW, 500)
+
+    clock.advance(2)
+    shaper.sweep()
+    assert FLOW in shaper.flows
+
+    clock.advance(10)
+    shaper.delay((('127.0.0.1', 4321), ('127.0.0.1', 8080)), 1)
+    assert FLOW not in shaper.flows
+
+
+def test_flow_key(clock):
+    """Connections of a client share its budget; directions are separate"""
+    other = (('127.0.0.1', 4321), ('127.0.0.1', 8080))
+    shaper = transmitm.Shaper(bandwidth=100, burst=1, clock=clock)
+
+    assert shaper.flow(FLOW, True) == shaper.flow(other, True)
+    assert shaper.flow(FLOW, True) != shaper.flow(FLOW, False)
+
+    shaper = transmitm.Shaper(bandwidth=100, key=lambda ip_tuple: ip_tuple,
+                              clock=clock)
+    assert shaper.flow(FLOW, True) != shaper.flow(other, True)
+
+
+def test_max_delay_default(clock):
+    """Datagrams are dropped by default rather than queued indefinitely"""
+    shaper = transmitm.Shaper(bandwidth=100, burst=0, clock=clock)
+
+    assert shaper.delay(FLOW, 100) == pytest.approx(1)
+    assert shaper.delay(FLOW, 100) is None
+
+
+class FakeTransport:
+    def __init__(self):
+        self.calls = list()
+
+    def pauseProducing(self):
+        self.calls.append('pause')
+
+    def resumeProducing(self):
+        self.calls.append('resume')
+
+
+def test_tcp_hold(clock):
+    """Held TCP data pauses reading until it's released"""
+    received = list()
+    shaper = transmitm.Shaper(bandwidth=100, burst=0, clock=clock)
+    proxy = transmitm.TCPProxy('127.0.0.1', 80, shaper=shaper)
+    proto = SimpleNamespace(factory=SimpleNamespace(proxy=proxy),
+                            transport=FakeTransport(),
+                            ip_tuple=FLOW,
+                            taps=[],
+                            flow=shaper.flow(FLOW, True))
+
+    @transmitm.TCPProxy.intercept
+    def dataReceived(proto, data):
+        received.append(data)
+
+    dataReceived(proto, b'x' * 50)
+    assert received == [] and proto.transport.calls == ['pause']
+
+    clock.advance(0.4)
+    assert received == []
+
+    clock.advance(0.1)
+    assert received == [b'x' * 50]
+    assert proto.transport.calls == ['pause', 'resume']
+
+
+def test_udp_hold(clock):
+    """Held datagrams are released in order; those past max_delay dropped"""
+    received = list()
+    shaper = transmitm.Shaper(bandwidth=100, burst=0, max_delay=1,
+                              clock=clock)
+    proxy = transmitm.UDPProxy('127.0.0.1', 53, shaper=shaper)
+    proto = SimpleNamespace(proxy=proxy)
+    flow = shaper.flow(FLOW, True)
+
+    @transmitm.UDPProxy.intercept
+    def relay(proto, data, ip_tuple, taps, flow):
+        received.append(data)
+
+    for data in (b'a' * 50, b'b' * 50, b'c' * 50):
+        relay(proto, data, FLOW, [], flow)
+
+    clock.advance(0.5)
+    assert received == [b'a' * 50]
+
+    clock.advance(0.5)
+    assert received == [b'a' * 50, b'b' * 50]
+
+    clock.advance(10)
+    assert received == [b'a' * 50, b'b' * 50]
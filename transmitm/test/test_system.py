@@ -7,6 +7,7 @@ import transmitm
 from ipaddress import ip_address, IPv4Address
 from functools import wraps
 from twisted.internet import reactor, protocol, threads, defer, address, error
+from twisted.internet import tcp as twisted_tcp, udp as twisted_udp
 
 
 class ForwardTap(transmitm.Tap):
@@ -27,6 +28,17 @@ class MangleTap(transmitm.Tap):
         return data.replace(self.needle, self.replace)
 
 
+class CountTap(transmitm.Tap):
+    """Counts handled chunks
+    """
+    def __init__(self):
+        self.count = 0
+
+    def handle(self, data, ip_tuple):
+        self.count += 1
+        return data
+
+
 def test_dispatcher_run():
     """Tests if Dispatcher.run starts the reactor
     """
@@ -178,6 +190,53 @@ class TestTCP(BaseTest):
                                                   tcp_proxy.bind_port)
         assert echoed_data == b'Hello, Universe!'
 
+    @defer.inlineCallbacks
+    def test_echo_proxy_tap_filter(self):
+        tap1 = MangleTap(b'World', b'Galaxy')
+        tap2 = MangleTap(b'Galaxy', b'Universe')
+        tcp_proxy = transmitm.TCPProxy(self.lo, self.port)
+        tcp_proxy.add_tap(tap1, flow_filter=lambda ip_tuple: True)
+        tcp_proxy.add_tap(tap2, flow_filter=lambda ip_tuple: False)
+
+        yield threads.deferToThread(transmitm.Dispatcher.add_proxy, tcp_proxy)
+
+        echoed_data = yield threads.deferToThread(self._send_data, self.lo,
+                                                  tcp_proxy.bind_port)
+        assert echoed_data == b'Hello, Galaxy!'
+
+    @defer.inlineCallbacks
+    def test_echo_proxy_tap_filter_both_arms(self):
+        """Client based filters apply to the server responses as well"""
+        tap = CountTap()
+        tcp_proxy = transmitm.TCPProxy(self.lo, self.port)
+
+        def from_lo(ip_tuple):
+            return ip_tuple[0][0] == self.lo
+
+        tcp_proxy.add_tap(tap, flow_filter=from_lo)
+
+        yield threads.deferToThread(transmitm.Dispatcher.add_proxy, tcp_proxy)
+
+        echoed_data = yield threads.deferToThread(self._send_data, self.lo,
+                                                  tcp_proxy.bind_port)
+        assert echoed_data == self.data
+        assert tap.count == 2
+
+    @defer.inlineCallbacks
+    def test_echo_proxy_shaper(self):
+        shaper = transmitm.Shaper(bandwidth=130, burst=0)
+        tcp_proxy = transmitm.TCPProxy(self.lo, self.port, shaper=shaper)
+
+        yield threads.deferToThread(transmitm.Dispatcher.add_proxy, tcp_proxy)
+
+        start = time.monotonic()
+        echoed_data = yield threads.deferToThread(self._send_data, self.lo,
+                                                  tcp_proxy.bind_port)
+        assert echoed_data == self.data
+        assert len(shaper.flows) == 2
+        # 13 bytes at 130 B/s with no burst are held 0.1s in each direction
+        assert time.monotonic() - start >= 0.2
+
 
 class EchoUDP(protocol.DatagramProtocol):
     def datagramReceived(self, datagram, address):
@@ -281,3 +340,101 @@ class TestUDP(BaseTest):
         echoed_data = yield threads.deferToThread(self._send_data, self.lo,
                                                   udp_proxy.bind_port)
         assert echoed_data == b'Hello, Universe!'
+
+    @defer.inlineCallbacks
+    def test_echo_proxy_tap_filter(self):
+        tap1 = MangleTap(b'World', b'Galaxy')
+        tap2 = MangleTap(b'Galaxy', b'Universe')
+        udp_proxy = transmitm.UDPProxy(self.lo, self.port)
+        udp_proxy.add_tap(tap1, flow_filter=lambda ip_tuple: True)
+        udp_proxy.add_tap(tap2, flow_filter=lambda ip_tuple: False)
+
+        yield threads.deferToThread(transmitm.Dispatcher.add_proxy, udp_proxy)
+
+        echoed_data = yield threads.deferToThread(self._send_data, self.lo,
+                                                  udp_proxy.bind_port)
+        assert echoed_data == b'Hello, Galaxy!'
+
+    @defer.inlineCallbacks
+    def test_echo_proxy_tap_filter_both_arms(self):
+        """Client based filters apply to the server responses as well"""
+        tap = CountTap()
+        udp_proxy = transmitm.UDPProxy(self.lo, self.port)
+
+        def from_lo(ip_tuple):
+            return ip_tuple[0][0] == self.lo
+
+        udp_proxy.add_tap(tap, flow_filter=from_lo)
+
+        yield threads.deferToThread(transmitm.Dispatcher.add_proxy, udp_proxy)
+
+        echoed_data = yield threads.deferToThread(self._send_data, self.lo,
+                                                  udp_proxy.bind_port)
+        assert echoed_data == self.data
+        assert tap.count == 2
+
+    @defer.inlineCallbacks
+    def test_echo_proxy_shaper(self):
+        shaper = transmitm.Shaper(bandwidth=130, burst=0)
+        udp_proxy = transmitm.UDPProxy(self.lo, self.port, shaper=shaper)
+
+        yield threads.deferToThread(transmitm.Dispatcher.add_proxy, udp_proxy)
+
+        start = time.monotonic()
+        echoed_data = yield threads.deferToThread(self._send_data, self.lo,
+                                                  udp_proxy.bind_port)
+        assert echoed_data == self.data
+        assert len(shaper.flows) == 2
+        # 13 bytes at 130 B/s with no burst are held 0.1s in each direction
+        assert time.monotonic() - start >= 0.2
+
+
+class TestDispatcher:
+    def setup_method(self):
+        self.before = self._listeners()
+
+    def teardown_method(self):
+        for listener in self._listeners() - self.before:
+            listener.stopListening()
+
+    @staticmethod
+    def _listeners():
+        """Get the listening ports of the reactor, to clean up after a test
+        """
+        return {
+            reader for reader in reactor.getReaders()
+            if isinstance(reader, (twisted_tcp.Port, twisted_udp.Port))
+        }
+
+    def test_interfaces(self):
+        """Wildcard and hostname interfaces can be registered"""
+        proxies = [
+            transmitm.TCPProxy('127.0.0.1', 9, interface=''),
+            transmitm.TCPProxy('127.0.0.1', 9, interface='localhost')
+        ]
+        transmitm.Dispatcher.add_proxies(proxies)
+
+        assert all(proxy.bind_port for proxy in proxies)
+        assert all(
+            any(proxy is registered
+                for registered in transmitm.Dispatcher.proxies)
+            for proxy in proxies)
+
+    def test_same_port_interfaces(self):
+        """Proxies to the same server may share a port on distinct
+        interfaces; all of them are registered
+        """
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+
+        proxies = [
+            transmitm.TCPProxy('127.0.0.1', 9, bind_port=port,
+                               interface=interface)
+            for interface in ('127.0.0.1', '127.0.0.2')
+        ]
+        registered = len(transmitm.Dispatcher.proxies)
+        transmitm.Dispatcher.add_proxies(proxies)
+
+        assert len(transmitm.Dispatcher.proxies) == registered + 2
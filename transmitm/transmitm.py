@@ -1,7 +1,10 @@
 from . import udp
 from . import tcp
+from .proxy import _reactor
 from abc import ABCMeta, abstractmethod
-from twisted.internet import reactor
+from functools import lru_cache
+from ipaddress import ip_address
+from time import perf_counter
 
 
 class Tap(metaclass=ABCMeta):
@@ -25,11 +28,16 @@ class Dispatcher:
     Raises:
         TypeError: on instantiation
     """
-    proxies = set()
+    proxies = list()
+    # Index of bound interfaces: (proxy class, port, family) -> {address}
+    _binds = dict()
+    # Seconds spent registering proxies
+    startup_time = 0.0
 
     @classmethod
     def add_proxies(disp, proxies):
-        """Register a proxy object to the proxies pool
+        """Register a proxy object to the proxies pool; bind collisions are
+        checked for the whole list before any proxy is spawned
 
         Args:
             disp (Dispatcher): self class
@@ -39,9 +47,37 @@ class Dispatcher:
         Raises:
             RuntimeError: on adding proxies that bind to the same tuple
         """
-        for proxy in proxies:
+        start = perf_counter()
+        proxies = list(proxies)
+        addresses = [disp._bind_address(proxy.interface) for proxy in proxies]
+        binds = disp._binds
+        pending = dict()
+
+        for proxy, (family, address) in zip(proxies, addresses):
+            if proxy.bind_port:
+                key = (proxy.__class__, proxy.bind_port, family)
+
+                # Most binds use a port of their own; skip the full check
+                if key in binds or key in pending:
+                    disp._check_bind(proxy, key, address, binds, pending)
+                    pending.setdefault(key, set()).add(address)
+                else:
+                    pending[key] = {address}
+
+        for proxy, (family, address) in zip(proxies, addresses):
             proxy.spawn()
-            disp.proxies.add(proxy)
+            disp.proxies.append(proxy)
+
+            # Random ports are only known once bound
+            key = (proxy.__class__, proxy.bind_port, family)
+            bound = binds.get(key)
+
+            if bound is None:
+                binds[key] = {address}
+            else:
+                bound.add(address)
+
+        disp.startup_time += perf_counter() - start
 
     @classmethod
     def add_proxy(disp, proxy):
@@ -51,7 +87,41 @@ class Dispatcher:
     def run():
         """Starts twisted reactor; blocking method
         """
-        reactor.run()
+        _reactor().run()
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _bind_address(interface):
+        """Get the (family, address) an interface binds to; parsing addresses
+        dominates bulk registration, so results are cached. Interfaces which
+        are not IP literals (e.g. hostnames) are compared as plain strings
+        """
+        if not interface:
+            # Twisted binds all IPv4 interfaces for an empty string
+            interface = '0.0.0.0'
+
+        try:
+            address = ip_address(interface)
+        except ValueError:
+            return None, interface.lower()
+
+        return address.version, address
+
+    @staticmethod
+    def _check_bind(proxy, key, address, *indexes):
+        """Raise if a proxy's bind tuple is taken in any of the indexes;
+        an unspecified address (e.g. 0.0.0.0) collides with every other
+        address of its family
+        """
+        for index in indexes:
+            bound = index.get(key, ())
+
+            if address in bound or bound and any(
+                    getattr(other, 'is_unspecified', False)
+                    for other in (address, *bound)):
+                raise RuntimeError('{} bind {}:{} is already in use'.format(
+                    proxy.__class__.__name__, proxy.interface,
+                    proxy.bind_port))
 
     @classmethod
     def __new__(cls, *args, **kwargs):
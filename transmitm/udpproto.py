@@ -0,0 +1,108 @@
+from .proxy import Proxy, _reactor
+from .udp import UDPProxy
+from socket import SOL_SOCKET, SO_RCVBUF, SO_SNDBUF
+from twisted.internet import protocol, error
+
+
+class UDPProto(protocol.DatagramProtocol):
+    BUFFERSIZE = 2 * 1024 * 1024
+    # Same as TCPServerFactory; a protocol is started per proxy and mapping
+    noisy = False
+
+    def _set_buffer_size(self):
+        """Increase SEND and RECV buffer size to minimize packet lost when
+        processing large ammounts of traffic
+        """
+        sock = self.transport.getHandle()
+        sock.setsockopt(SOL_SOCKET, SO_RCVBUF, self.BUFFERSIZE)
+        sock.setsockopt(SOL_SOCKET, SO_SNDBUF, self.BUFFERSIZE)
+
+
+class UDPServerProtocol(UDPProto):
+    """Acts as intermediary client for the UDP protocol
+    """
+    def __init__(self, server_ip, server_port, proxy):
+        self.server_tuple = (server_ip, server_port)
+        self.proxy = proxy
+        self.clients = dict()
+
+    def startProtocol(self):
+        self._set_buffer_size()
+        self.listen_addr = self.transport.socket.getsockname()
+
+    def datagramReceived(self, data, peer):
+        """When data is received from the target server create an intermediary
+        socket to map server responses toq one particular client
+        """
+        client = self.clients.get(peer)
+
+        if client.__class__ is not UDPClientProtocol:
+            factory = UDPClientProtocol(self.server_tuple,
+                                        proxy=self.proxy,
+                                        parent=self,
+                                        source=peer)
+
+            # Get bind interface for proxy client socket
+            bind_iface = Proxy.get_bind_interface(self.server_tuple[0])
+
+            # Attempt to reuse port
+            _bind_port = client or 0
+            reactor = _reactor()
+            try:
+                listener = reactor.listenUDP(_bind_port,
+                                             factory,
+                                             interface=bind_iface)
+            except error.CannotListenError:
+                listener = reactor.listenUDP(0, factory, interface=bind_iface)
+
+            factory.bind_port = listener.getHost().port
+            self.clients[peer] = client = factory
+
+        self.relay(data, client.ip_tuple, client.taps, client.upstream)
+
+    @UDPProxy.intercept
+    def relay(self, data, ip_tuple, taps, flow):
+        """Forward client data to the target server through the client's
+        intermediary socket
+        """
+        client = self.clients.get(ip_tuple[0])
+
+        # A delayed datagram may outlive its mapping
+        if client.__class__ is UDPClientProtocol:
+            client.transport.write(data)
+
+
+class UDPClientProtocol(UDPProto):
+    """Client mapping; also holds the flow state of both directions so that
+    it's released along with the mapping
+    """
+    def __init__(self, server_tuple, proxy, parent, source):
+        self.server_tuple = server_tuple
+        self.proxy = proxy
+        self.parent = parent
+        self.source = source
+        # Client facing ip_tuple; tap filters and the shaper key on it
+        self.ip_tuple = (source, parent.listen_addr)
+        self.taps = proxy.flow_taps(self.ip_tuple)
+        self.upstream = self.downstream = None
+
+        if proxy.shaper is not None:
+            self.upstream = proxy.shaper.flow(self.ip_tuple, True)
+            self.downstream = proxy.shaper.flow(self.ip_tuple, False)
+
+    def startProtocol(self):
+        self._set_buffer_size()
+        self.transport.connect(*self.server_tuple)
+        self.self_tuple = Proxy.socket_tuple(self.transport.socket)
+
+    def datagramReceived(self, data, peer):
+        self.relay(data, self.self_tuple, self.taps, self.downstream)
+
+    @UDPProxy.intercept
+    def relay(self, data, ip_tuple, taps, flow):
+        """Forward server data back to the client"""
+        self.parent.transport.write(data, self.source)
+
+    def stopProtocol(self):
+        """Save bind_port for later reuse"""
+        self.parent.clients[self.source] = self.bind_port